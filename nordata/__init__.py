@@ -10,11 +10,22 @@ from ._boto import boto_create_session
 from ._redshift import redshift_get_conn
 from ._redshift import read_sql
 from ._redshift import redshift_execute_sql
+from ._redshift import redshift_get_profile
 # S3 functions
 from ._s3 import s3_get_bucket
 from ._s3 import s3_download
 from ._s3 import s3_upload
 from ._s3 import s3_delete
+from ._s3 import s3_copy
+from ._s3 import s3_move
+from ._s3 import s3_map
+from ._s3 import s3_pack_upload
+from ._s3 import s3_pack_read
+from ._s3 import s3_pack_download
+from ._s3 import s3_select
+# Transfer functions
+from ._transfer import transfer_set_max_bandwidth
+from ._transfer import transfer_get_stats
 
 
-__all__ = ['_boto', '_redshift', '_s3']
+__all__ = ['_boto', '_redshift', '_s3', '_transfer']
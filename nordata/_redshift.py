@@ -1,7 +1,12 @@
 import os
+import time
 import psycopg2
 
 
+# profiling reports collected by redshift_execute_sql(profile=True), in call order
+_profile_reports = []
+
+
 def redshift_get_conn(env_var):
     """ Creates a Redshift connection object
 
@@ -55,7 +60,8 @@ def redshift_execute_sql(
         sql,
         env_var,
         return_data=False,
-        return_dict=False):
+        return_dict=False,
+        profile=False):
     """ Ingests a SQL query as a string and executes it (potentially returning data)
 
     Parameters
@@ -70,6 +76,9 @@ def redshift_execute_sql(
         whether or not the query should return data
     return_dict : bool
         whether or not to return data as a dict (for easy ingestion into pandas)
+    profile : bool
+        whether or not to record timings and Redshift execution details, retrieved with redshift_get_profile()
+        (profiling does not change how the query is run or what it returns)
 
     Returns
     -------
@@ -101,27 +110,147 @@ def redshift_execute_sql(
         env_var='REDSHIFT_CREDS',
         return_data=True,
         return_dict=True))
+
+    # Profile a statement, then inspect where the time went
+    redshift_execute_sql(sql=sql, env_var='REDSHIFT_CREDS', profile=True)
+    profile = redshift_get_profile()
     """
     _redshift_execute_sql_arg_validator(sql=sql, env_var=env_var, return_data=return_data, return_dict=return_dict)
+    if not isinstance(profile, bool):
+        raise TypeError('profile must be of bool type')
+    timings = {}
     try:
+        start = time.perf_counter()
         with redshift_get_conn(env_var=env_var) as conn:
+            timings['connect'] = time.perf_counter() - start
             with conn.cursor() as cursor:
+                start = time.perf_counter()
+                # the cursor is client-side, so execute() also receives every row of the result
                 cursor.execute(sql)
+                timings['execute'] = time.perf_counter() - start
+                result = None
                 if return_data:
+                    start = time.perf_counter()
                     columns = [desc[0] for desc in cursor.description]
                     data = [row for row in cursor]
-                    conn.commit()
+                    timings['fetch'] = time.perf_counter() - start
                     if return_dict:
-                        return {'data': data, 'columns': columns}
+                        result = {'data': data, 'columns': columns}
                     else:
-                        return data, columns
-                else:
-                    conn.commit()
-                    return
+                        result = data, columns
+            conn.commit()
+            if profile:
+                with conn.cursor() as cursor:
+                    _profile_reports.append(_redshift_profile_query(cursor=cursor, sql=sql, timings=timings))
+            return result
     except psycopg2.ProgrammingError as e:  # check "Cannot find reference" warning
         raise RuntimeError('SQL ProgrammingError = {0}'.format(e))
 
 
+def redshift_get_profile(reset=False):
+    """ Returns the reports recorded by redshift_execute_sql(profile=True) in this process and their totals
+
+    Each report holds the client-side timings of one call along with the execution details Redshift recorded for
+    its query id in STL_WLM_QUERY (queueing and execution), SVL_COMPILE (compilation) and SVL_QUERY_SUMMARY (steps).
+    Redshift populates these system tables asynchronously, so details may be missing for a query that has only
+    just finished, and statements answered by the leader node or result cache have no query id (-1).
+
+    The client-side timings are 'connect' (opening the connection), 'execute' (running the statement and receiving
+    every row of its result, as psycopg2 cursors are client-side) and 'fetch' (building the returned rows from the
+    received result, only present when data is returned). Time spent returning rows to the client is therefore
+    roughly 'execute' less the queue and exec seconds Redshift reports in 'wlm'.
+
+    Parameters
+    ----------
+    reset : bool
+        whether or not to clear the recorded reports after returning them
+
+    Returns
+    -------
+    dict
+        'queries' (number of reports), 'totals' (dict of summed seconds for 'connect', 'execute', 'fetch',
+        'queue', 'exec' and 'compile') and 'reports' (list of dicts with keys 'query_id', 'sql', 'timings',
+        'wlm', 'compile', 'steps' and 'error')
+
+    Example use
+    -----------
+    redshift_execute_sql(sql=sql, env_var='REDSHIFT_CREDS', profile=True)
+    profile = redshift_get_profile(reset=True)
+    print(profile['totals'])
+    """
+    if not isinstance(reset, bool):
+        raise TypeError('reset must be of bool type')
+    reports = list(_profile_reports)
+    if reset:
+        del _profile_reports[:len(reports)]
+    totals = dict.fromkeys(['connect', 'execute', 'fetch', 'queue', 'exec', 'compile'], 0.0)
+    for report in reports:
+        for key, seconds in report['timings'].items():
+            totals[key] += seconds
+        if report['wlm']:
+            totals['queue'] += report['wlm']['queue_seconds']
+            totals['exec'] += report['wlm']['exec_seconds']
+        totals['compile'] += report['compile']['compile_seconds']
+    return {'queries': len(reports), 'totals': totals, 'reports': reports}
+
+
+def _redshift_profile_query(cursor, sql, timings):
+    """ Looks up the last query run on the cursor's connection in the Redshift system tables
+
+    Parameters
+    ----------
+    cursor : psycopg2 cursor object
+        cursor on the connection that executed the query (after commit)
+    sql : str
+        SQL query that was executed
+    timings : dict
+        client-side timings in seconds with keys 'connect', 'execute' and (if data was returned) 'fetch'
+
+    Returns
+    -------
+    dict
+        report with keys 'query_id', 'sql', 'timings', 'wlm', 'compile', 'steps' and 'error'
+    """
+    report = {
+        'query_id': None,
+        'sql': sql,
+        'timings': timings,
+        'wlm': None,
+        'compile': {'segments': 0, 'compiled_segments': 0, 'compile_seconds': 0.0},
+        'steps': [],
+        'error': None}
+    try:
+        cursor.execute('select pg_last_query_id();')
+        report['query_id'] = query_id = cursor.fetchone()[0]
+        cursor.execute(
+            'select service_class, total_queue_time, total_exec_time from stl_wlm_query where query = %s;',
+            (query_id,))
+        row = cursor.fetchone()
+        if row is not None:
+            # system table times are in microseconds
+            report['wlm'] = {
+                'service_class': row[0],
+                'queue_seconds': row[1] / 1e6,
+                'exec_seconds': row[2] / 1e6}
+        cursor.execute('select starttime, endtime, compile from svl_compile where query = %s;', (query_id,))
+        for starttime, endtime, compiled in cursor.fetchall():
+            report['compile']['segments'] += 1
+            if compiled:
+                report['compile']['compiled_segments'] += 1
+                report['compile']['compile_seconds'] += (endtime - starttime).total_seconds()
+        cursor.execute(
+            'select stm, seg, step, label, maxtime, avgtime, rows, bytes, is_diskbased '
+            'from svl_query_summary where query = %s order by stm, seg, step;',
+            (query_id,))
+        columns = [desc[0] for desc in cursor.description]
+        report['steps'] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    except psycopg2.Error as e:
+        # profiling must never fail the query itself
+        cursor.connection.rollback()
+        report['error'] = str(e).strip()
+    return report
+
+
 def _create_creds_dict(creds_str):
     """ Takes the credentials str and converts it to a dict
 
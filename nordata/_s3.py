@@ -1,7 +1,16 @@
+import io
 import os
 import glob
+import json
+import queue
+import shutil
+import threading
+import uuid
 import boto3
+from functools import reduce
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from ._boto import boto_create_session
+from ._transfer import _scheduler, _transfer_arg_validator
 from botocore.exceptions import ClientError
 from boto3.exceptions import S3UploadFailedError
 from boto3.s3.transfer import TransferConfig
@@ -55,7 +64,9 @@ def s3_download(
         profile_name='default',
         region_name='us-west-2',
         multipart_threshold=8388608,
-        multipart_chunksize=8388608):
+        multipart_chunksize=8388608,
+        max_bandwidth=None,
+        priority='interactive'):
     """ Downloads a file or collection of files from S3
 
     Parameters
@@ -74,6 +85,10 @@ def s3_download(
         minimum file size to initiate multipart download
     multipart_chunksize : int
         chunksize for multipart download
+    max_bandwidth : int or float or None
+        maximum bytes per second for this call (default None, unlimited; see also transfer_set_max_bandwidth)
+    priority : str
+        'interactive' or 'bulk', bulk transfers yield to interactive ones under a global cap (default 'interactive')
 
     Returns
     -------
@@ -111,9 +126,18 @@ def s3_download(
         bucket='my_bucket',
         s3_filepath='tmp/*',
         local_filepath='../data/')
+
+    # Downloading as a bulk transfer limited to 20 MB/s:
+    s3_download(
+        bucket='my_bucket',
+        s3_filepath='tmp/*',
+        local_filepath='../data/',
+        max_bandwidth=20 * 1024 ** 2,
+        priority='bulk')
     """
     # validate s3_filepath and local_filepath arguments
     _download_upload_filepath_validator(s3_filepath=s3_filepath, local_filepath=local_filepath)
+    _transfer_arg_validator(max_bandwidth=max_bandwidth, priority=priority)
     # create bucket object
     my_bucket = s3_get_bucket(
         bucket=bucket,
@@ -131,19 +155,25 @@ def s3_download(
         else:
             s3_filepath = [s3_filepath]
             local_filepath = [local_filepath]
-    # download all files from S3
-    for s3_key, local_file in zip(s3_filepath, local_filepath):
-        try:
-            my_bucket.download_file(
-                s3_key,
-                local_file,
-                Config=config)
-        except ClientError as e:
-            error_code = int(e.response['Error']['Code'])
-            if error_code == 400:
-                raise NameError('The credentials are expired or not valid. ' + str(e))
-            else:
-                raise e
+    # register with the scheduler so bandwidth caps and priority apply
+    transfer = _scheduler.start(priority=priority, max_bandwidth=max_bandwidth)
+    try:
+        # download all files from S3
+        for s3_key, local_file in zip(s3_filepath, local_filepath):
+            try:
+                my_bucket.download_file(
+                    s3_key,
+                    local_file,
+                    Config=config,
+                    Callback=_scheduler.callback(transfer))
+            except ClientError as e:
+                error_code = int(e.response['Error']['Code'])
+                if error_code == 400:
+                    raise NameError('The credentials are expired or not valid. ' + str(e))
+                else:
+                    raise e
+    finally:
+        _scheduler.finish(transfer)
     return
 
 
@@ -154,7 +184,9 @@ def s3_upload(
         profile_name='default',
         region_name='us-west-2',
         multipart_threshold=8388608,
-        multipart_chunksize=8388608):
+        multipart_chunksize=8388608,
+        max_bandwidth=None,
+        priority='interactive'):
     """ Uploads a file or collection of files to S3
 
     Parameters
@@ -173,6 +205,10 @@ def s3_upload(
         minimum file size to initiate multipart upload
     multipart_chunksize : int
         chunksize for multipart upload
+    max_bandwidth : int or float or None
+        maximum bytes per second for this call (default None, unlimited; see also transfer_set_max_bandwidth)
+    priority : str
+        'interactive' or 'bulk', bulk transfers yield to interactive ones under a global cap (default 'interactive')
 
     Returns
     -------
@@ -211,8 +247,17 @@ def s3_upload(
         bucket='my_bucket',
         local_filepath='../data/*'
         s3_filepath='tmp/')
+
+    Uploading as a bulk transfer limited to 20 MB/s:
+    s3_upload(
+        bucket='my_bucket',
+        local_filepath='../data/*',
+        s3_filepath='tmp/',
+        max_bandwidth=20 * 1024 ** 2,
+        priority='bulk')
     """
     _download_upload_filepath_validator(s3_filepath=s3_filepath, local_filepath=local_filepath)
+    _transfer_arg_validator(max_bandwidth=max_bandwidth, priority=priority)
     my_bucket = s3_get_bucket(
         bucket=bucket,
         profile_name=profile_name,
@@ -230,15 +275,21 @@ def s3_upload(
         else:
             local_filepath = [local_filepath]
             s3_filepath = [s3_filepath]
-    # upload all files to S3
-    for local_file, s3_key in zip(local_filepath, s3_filepath):
-        try:
-            my_bucket.upload_file(
-                local_file,
-                s3_key,
-                Config=config)
-        except boto3.exceptions.S3UploadFailedError as e:
-            raise S3UploadFailedError(str(e))
+    # register with the scheduler so bandwidth caps and priority apply
+    transfer = _scheduler.start(priority=priority, max_bandwidth=max_bandwidth)
+    try:
+        # upload all files to S3
+        for local_file, s3_key in zip(local_filepath, s3_filepath):
+            try:
+                my_bucket.upload_file(
+                    local_file,
+                    s3_key,
+                    Config=config,
+                    Callback=_scheduler.callback(transfer))
+            except boto3.exceptions.S3UploadFailedError as e:
+                raise S3UploadFailedError(str(e))
+    finally:
+        _scheduler.finish(transfer)
     return
 
 
@@ -299,13 +350,1066 @@ def s3_delete(
                 return []
         else:
             s3_filepath = [s3_filepath]
-    del_dict = {}
-    objects = []
-    for key in s3_filepath:
-        objects.append({'Key': key})
-    del_dict['Objects'] = objects
-    response = my_bucket.delete_objects(Delete=del_dict)
-    return response['Deleted']
+    return _s3_delete_keys(s3_keys=s3_filepath, my_bucket=my_bucket)
+
+
+def s3_copy(
+        bucket,
+        source_s3_filepath,
+        dest_s3_filepath,
+        dest_bucket=None,
+        profile_name='default',
+        region_name='us-west-2',
+        multipart_threshold=5368709120,
+        multipart_chunksize=67108864,
+        max_workers=10):
+    """ Copies a file or collection of files within S3 without downloading them
+
+    Parameters
+    ----------
+    bucket : str
+        name of S3 bucket containing the source file(s)
+    source_s3_filepath : str or list
+        path and filename(s) within the bucket of the file(s) to be copied
+    dest_s3_filepath : str or list
+        path and filename(s) within the destination bucket for the copied file(s)
+    dest_bucket : str or None
+        name of destination S3 bucket (default None, copies within bucket)
+    profile_name : str
+        profile name for credentials (default 'default' or organization-specific)
+    region_name : str
+        name of AWS region (default value 'us-west-2')
+    multipart_threshold : int
+        minimum file size to initiate multipart copy (default 5 GB, the CopyObject limit)
+    multipart_chunksize : int
+        chunksize for multipart copy
+    max_workers : int
+        number of files copied concurrently
+
+    Returns
+    -------
+    None
+
+    Example use
+    -----------
+    # Copying a single file within S3:
+    s3_copy(
+        bucket='my_bucket',
+        source_s3_filepath='staging/my_file.csv',
+        dest_s3_filepath='prod/my_file.csv')
+
+    # Copying a list of files to another bucket:
+    s3_copy(
+        bucket='my_bucket',
+        source_s3_filepath=['staging/my_file1.csv', 'staging/my_file2.csv'],
+        dest_s3_filepath=['prod/my_file1.csv', 'prod/my_file2.csv'],
+        dest_bucket='my_other_bucket')
+
+    # Copying all files in a directory (will not copy contents of subdirectories):
+    s3_copy(
+        bucket='my_bucket',
+        source_s3_filepath='staging/*',
+        dest_s3_filepath='prod/')
+    """
+    _s3_copy(
+        bucket=bucket,
+        source_s3_filepath=source_s3_filepath,
+        dest_s3_filepath=dest_s3_filepath,
+        dest_bucket=dest_bucket,
+        profile_name=profile_name,
+        region_name=region_name,
+        multipart_threshold=multipart_threshold,
+        multipart_chunksize=multipart_chunksize,
+        max_workers=max_workers)
+    return
+
+
+def s3_move(
+        bucket,
+        source_s3_filepath,
+        dest_s3_filepath,
+        dest_bucket=None,
+        profile_name='default',
+        region_name='us-west-2',
+        multipart_threshold=5368709120,
+        multipart_chunksize=67108864,
+        max_workers=10):
+    """ Moves a file or collection of files within S3 without downloading them
+
+    Every file is copied before any source file is deleted, so a failed copy leaves the sources in place. If any
+    source file cannot be deleted after copying, a RuntimeError listing those files is raised.
+
+    Parameters
+    ----------
+    bucket : str
+        name of S3 bucket containing the source file(s)
+    source_s3_filepath : str or list
+        path and filename(s) within the bucket of the file(s) to be moved
+    dest_s3_filepath : str or list
+        path and filename(s) within the destination bucket for the moved file(s)
+    dest_bucket : str or None
+        name of destination S3 bucket (default None, moves within bucket)
+    profile_name : str
+        profile name for credentials (default 'default' or organization-specific)
+    region_name : str
+        name of AWS region (default value 'us-west-2')
+    multipart_threshold : int
+        minimum file size to initiate multipart copy (default 5 GB, the CopyObject limit)
+    multipart_chunksize : int
+        chunksize for multipart copy
+    max_workers : int
+        number of files copied concurrently
+
+    Returns
+    -------
+    List
+        Deleted source keys
+
+    Example use
+    -----------
+    # Moving a single file within S3:
+    resp = s3_move(
+        bucket='my_bucket',
+        source_s3_filepath='staging/my_file.csv',
+        dest_s3_filepath='prod/my_file.csv')
+
+    # Moving files matching a pattern (will not move contents of subdirectories):
+    resp = s3_move(
+        bucket='my_bucket',
+        source_s3_filepath='staging/*.csv',
+        dest_s3_filepath='prod/')
+    """
+    my_bucket, source_s3_filepath = _s3_copy(
+        bucket=bucket,
+        source_s3_filepath=source_s3_filepath,
+        dest_s3_filepath=dest_s3_filepath,
+        dest_bucket=dest_bucket,
+        profile_name=profile_name,
+        region_name=region_name,
+        multipart_threshold=multipart_threshold,
+        multipart_chunksize=multipart_chunksize,
+        max_workers=max_workers)
+    if not source_s3_filepath:  # check if this list of S3 filepaths is empty
+        return []
+    return _s3_delete_keys(s3_keys=source_s3_filepath, my_bucket=my_bucket)
+
+
+def s3_map(
+        bucket,
+        s3_filepath,
+        func,
+        reduce_func=None,
+        initial=None,
+        processes=None,
+        threads_per_process=10,
+        profile_name='default',
+        region_name='us-west-2'):
+    """ Applies a function to the contents of a file or collection of files in S3 across a process pool
+
+    Each file is read into memory (never written to disk) and passed to func as func(s3_key, body). Keys are
+    sharded into batches across the processes and each process reads its batch with threads_per_process threads,
+    so both network and CPU-bound work are spread over all cores. func and reduce_func must be defined at module
+    level so that they can be sent to the worker processes.
+
+    Parameters
+    ----------
+    bucket : str
+        name of S3 bucket
+    s3_filepath : str or list
+        path and filename(s) within the bucket of the file(s) to be processed
+    func : callable
+        function called as func(s3_key, body) where body is the file contents as bytes
+    reduce_func : callable or None
+        function combining two results, applied over all results if provided (default None); results are combined
+        in order of completion, so reduce_func must be associative and commutative (e.g. operator.add or max)
+    initial : object or None
+        starting value for reduce_func, also returned when no files match (default None, the first result is
+        used as the starting value and None is returned when no files match)
+    processes : int or None
+        number of worker processes (default None, the number of CPUs)
+    threads_per_process : int
+        number of files each worker process reads concurrently
+    profile_name : str
+        profile name for credentials (default 'default' or organization-specific)
+    region_name : str
+        name of AWS region (default value 'us-west-2')
+
+    Returns
+    -------
+    generator of tuples or reduced result
+        if reduce_func is None then a generator of (s3_key, result) tuples, yielded in order of completion
+        if reduce_func is provided then the results of func reduced with reduce_func (see initial for no matches)
+
+    Example use
+    -----------
+    # Counting the rows of every csv in a directory:
+    def count_rows(s3_key, body):
+        return body.count(b'\\n')
+
+    for s3_key, n_rows in s3_map(bucket='my_bucket', s3_filepath='tmp/*.csv', func=count_rows):
+        print(s3_key, n_rows)
+
+    # Summing the row counts instead:
+    import operator
+    total_rows = s3_map(
+        bucket='my_bucket',
+        s3_filepath='tmp/*.csv',
+        func=count_rows,
+        reduce_func=operator.add,
+        initial=0,
+        processes=8,
+        threads_per_process=16)
+    """
+    _delete_filepath_validator(s3_filepath=s3_filepath)
+    _s3_map_arg_validator(
+        func=func,
+        reduce_func=reduce_func,
+        processes=processes,
+        threads_per_process=threads_per_process)
+    if isinstance(s3_filepath, str):
+        if '*' in s3_filepath:
+            my_bucket = s3_get_bucket(
+                bucket=bucket,
+                profile_name=profile_name,
+                region_name=region_name)
+            s3_filepath = _s3_glob(s3_filepath=s3_filepath, my_bucket=my_bucket)
+        else:
+            s3_filepath = [s3_filepath]
+    results = _s3_map_iter(
+        bucket=bucket,
+        s3_keys=s3_filepath,
+        func=func,
+        processes=processes,
+        threads_per_process=threads_per_process,
+        profile_name=profile_name,
+        region_name=region_name)
+    if reduce_func is None:
+        return results
+    values = (result for _, result in results)
+    if initial is None:
+        # with no starting value, reduce() cannot handle an empty match
+        return reduce(reduce_func, values) if s3_filepath else None
+    return reduce(reduce_func, values, initial)
+
+
+def s3_pack_upload(
+        bucket,
+        local_filepath,
+        s3_filepath,
+        bundle_size=67108864,
+        profile_name='default',
+        region_name='us-west-2',
+        multipart_threshold=8388608,
+        multipart_chunksize=8388608,
+        max_workers=4):
+    """ Packs a collection of small local files into a few large S3 objects with an index
+
+    Files are concatenated into bundles of roughly bundle_size bytes, stored as '<s3_filepath>.<upload id>.<n>.pack',
+    and an index of (name, bundle, offset, length) for every file is stored as '<s3_filepath>.index.json'. Each
+    upload writes its bundles under a new upload id and switches the index last, so an existing pack of the same
+    name stays readable until the new one is complete. The replaced pack's bundles are then deleted, and if a bundle
+    fails to upload, the bundles already uploaded are deleted and any existing pack is left untouched.
+    Files are named by their filename (without the local directory), which must be unique within the pack, and a
+    ValueError is raised if local_filepath matches no files.
+
+    Parameters
+    ----------
+    bucket : str
+        name of S3 bucket
+    local_filepath : str or list
+        path and filename(s) to be packed
+    s3_filepath : str
+        path and name of the pack within the bucket (without extension)
+    bundle_size : int
+        target size in bytes of each bundle (each bundle is held in memory while uploading)
+    profile_name : str
+        profile name for credentials (default 'default' or organization-specific)
+    region_name : str
+        name of AWS region (default value 'us-west-2')
+    multipart_threshold : int
+        minimum bundle size to initiate multipart upload
+    multipart_chunksize : int
+        chunksize for multipart upload
+    max_workers : int
+        number of bundles uploaded concurrently
+
+    Returns
+    -------
+    dict
+        the index that was uploaded
+
+    Example use
+    -----------
+    # Packing all files in a directory (will not pack contents of subdirectories):
+    s3_pack_upload(
+        bucket='my_bucket',
+        local_filepath='../data/images/*',
+        s3_filepath='tmp/images')
+
+    # Packing a list of files:
+    s3_pack_upload(
+        bucket='my_bucket',
+        local_filepath=['../data/img1.png', '../data/img2.png'],
+        s3_filepath='tmp/images')
+    """
+    _pack_filepath_validator(local_filepath=local_filepath, s3_filepath=s3_filepath)
+    for arg in (bundle_size, max_workers):
+        if not isinstance(arg, int) or arg < 1:
+            raise ValueError('bundle_size and max_workers must be positive ints')
+    if isinstance(local_filepath, str):
+        if '*' in local_filepath:
+            items = glob.glob(local_filepath)
+            # filter out directories
+            local_filepath = sorted(item for item in items if os.path.isfile(item))
+        else:
+            local_filepath = [local_filepath]
+    if not local_filepath:
+        # an empty pack would replace, and then delete, any existing pack of the same name
+        raise ValueError('No files to pack, local_filepath matched no files')
+    bundles, index = _s3_pack_plan(
+        local_filepath=local_filepath,
+        s3_filepath=s3_filepath,
+        bundle_size=bundle_size,
+        upload_id=uuid.uuid4().hex[:12])
+    my_bucket = s3_get_bucket(
+        bucket=bucket,
+        profile_name=profile_name,
+        region_name=region_name)
+    config = TransferConfig(multipart_threshold=multipart_threshold,
+                            multipart_chunksize=multipart_chunksize)
+    client = my_bucket.meta.client
+    old_index = _s3_pack_get_index(bucket=bucket, s3_filepath=s3_filepath, client=client, missing_ok=True)
+
+    def upload_one(s3_key, local_files):
+        body = io.BytesIO()
+        for local_file in local_files:
+            with open(local_file, 'rb') as f:
+                shutil.copyfileobj(f, body)
+        body.seek(0)
+        try:
+            client.upload_fileobj(body, bucket, s3_key, Config=config)
+        except boto3.exceptions.S3UploadFailedError as e:
+            raise S3UploadFailedError(str(e))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(upload_one, s3_key, local_files)
+                   for s3_key, local_files in zip(index['bundles'], bundles)]
+    try:
+        # re-raise the first error encountered, if any
+        for future in futures:
+            future.result()
+        client.put_object(
+            Bucket=bucket,
+            Key=s3_filepath + '.index.json',
+            Body=json.dumps(index).encode())
+    except Exception as e:
+        # remove this upload's bundles so that failed uploads do not leave orphans behind
+        uploaded = [key for key, future in zip(index['bundles'], futures) if future.exception() is None]
+        if uploaded:
+            _s3_delete_keys(s3_keys=uploaded, my_bucket=my_bucket)
+        if isinstance(e, ClientError):
+            raise S3UploadFailedError(str(e))
+        raise
+    if old_index is not None:
+        # the new index is live, so the replaced pack's bundles are no longer referenced
+        new_bundles = set(index['bundles'])
+        stale = [key for key in old_index['bundles'] if key not in new_bundles]
+        if stale:
+            _s3_delete_keys(s3_keys=stale, my_bucket=my_bucket)
+    return index
+
+
+def s3_pack_read(
+        bucket,
+        s3_filepath,
+        members,
+        profile_name='default',
+        region_name='us-west-2',
+        max_workers=10):
+    """ Reads individual files from a pack created by s3_pack_upload using ranged requests
+
+    Parameters
+    ----------
+    bucket : str
+        name of S3 bucket
+    s3_filepath : str
+        path and name of the pack within the bucket (without extension)
+    members : str or list
+        name(s) of the packed file(s) to be read
+    profile_name : str
+        profile name for credentials (default 'default' or organization-specific)
+    region_name : str
+        name of AWS region (default value 'us-west-2')
+    max_workers : int
+        number of files read concurrently
+
+    Returns
+    -------
+    bytes or dict
+        if members is a str then the contents of that file as bytes
+        if members is a list then dict mapping each name to the contents of that file as bytes
+
+    Example use
+    -----------
+    # Reading a single file from a pack:
+    data = s3_pack_read(bucket='my_bucket', s3_filepath='tmp/images', members='img1.png')
+
+    # Reading a list of files from a pack:
+    data_dict = s3_pack_read(bucket='my_bucket', s3_filepath='tmp/images', members=['img1.png', 'img2.png'])
+    """
+    if not isinstance(s3_filepath, str):
+        raise TypeError('s3_filepath must be of str type')
+    if not isinstance(members, (list, str)) or (isinstance(members, list) and
+                                                not all(isinstance(m, str) for m in members)):
+        raise TypeError('members must be of type str or list of str')
+    my_bucket = s3_get_bucket(
+        bucket=bucket,
+        profile_name=profile_name,
+        region_name=region_name)
+    client = my_bucket.meta.client
+    index = _s3_pack_get_index(bucket=bucket, s3_filepath=s3_filepath, client=client)
+    locations = {name: (bundle, offset, length) for name, bundle, offset, length in index['members']}
+    names = [members] if isinstance(members, str) else members
+    for name in names:
+        if name not in locations:
+            raise KeyError('{0} is not a member of the pack {1}'.format(name, s3_filepath))
+
+    def read_one(name):
+        bundle, offset, length = locations[name]
+        if length == 0:  # an empty range is not a valid Range header
+            return b''
+        response = _s3_pack_get_object(
+            client=client,
+            bucket=bucket,
+            s3_key=index['bundles'][bundle],
+            Range='bytes={0}-{1}'.format(offset, offset + length - 1))
+        return response['Body'].read()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        data = dict(zip(names, executor.map(read_one, names)))
+    if isinstance(members, str):
+        return data[members]
+    return data
+
+
+def s3_pack_download(
+        bucket,
+        s3_filepath,
+        local_filepath,
+        profile_name='default',
+        region_name='us-west-2',
+        max_workers=4):
+    """ Downloads a pack created by s3_pack_upload and unpacks every file into a local directory
+
+    Parameters
+    ----------
+    bucket : str
+        name of S3 bucket
+    s3_filepath : str
+        path and name of the pack within the bucket (without extension)
+    local_filepath : str
+        path to the local directory the files are unpacked into
+    profile_name : str
+        profile name for credentials (default 'default' or organization-specific)
+    region_name : str
+        name of AWS region (default value 'us-west-2')
+    max_workers : int
+        number of bundles downloaded concurrently (each bundle is held in memory while unpacking)
+
+    Returns
+    -------
+    list of str
+        local paths of the unpacked files
+
+    Example use
+    -----------
+    s3_pack_download(
+        bucket='my_bucket',
+        s3_filepath='tmp/images',
+        local_filepath='../data/images/')
+    """
+    for arg in (s3_filepath, local_filepath):
+        if not isinstance(arg, str):
+            raise TypeError('s3_filepath and local_filepath must be of str type')
+    my_bucket = s3_get_bucket(
+        bucket=bucket,
+        profile_name=profile_name,
+        region_name=region_name)
+    client = my_bucket.meta.client
+    index = _s3_pack_get_index(bucket=bucket, s3_filepath=s3_filepath, client=client)
+    bundle_members = [[] for _ in index['bundles']]
+    for name, bundle, offset, length in index['members']:
+        bundle_members[bundle].append((name, offset, length))
+
+    def unpack_one(s3_key, members):
+        body = _s3_pack_get_object(client=client, bucket=bucket, s3_key=s3_key)['Body'].read()
+        local_files = []
+        for name, offset, length in members:
+            local_file = os.path.join(local_filepath, name)
+            with open(local_file, 'wb') as f:
+                f.write(body[offset:offset + length])
+            local_files.append(local_file)
+        return local_files
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(unpack_one, index['bundles'], bundle_members)
+        return [local_file for local_files in results for local_file in local_files]
+
+
+def s3_select(
+        bucket,
+        s3_filepath,
+        sql,
+        local_filepath=None,
+        input_format='csv',
+        output_format='csv',
+        compression='NONE',
+        csv_header=True,
+        profile_name='default',
+        region_name='us-west-2',
+        max_workers=10):
+    """ Filters a file or collection of files in S3 with S3 Select so that only matching records are transferred
+
+    The SQL expression refers to each file as S3Object (e.g. "select s.col1 from S3Object s where s.col2 > 10").
+    CSV files with a header row (csv_header) have their columns referenced by name, otherwise by position (s._1,
+    s._2, ...), and quoted fields may contain newlines. Files are queried concurrently and records are returned in
+    order within each file, but records from different files may be interleaved.
+
+    Parameters
+    ----------
+    bucket : str
+        name of S3 bucket
+    s3_filepath : str or list
+        path and filename(s) within the bucket of the file(s) to be queried
+    sql : str
+        S3 Select SQL expression
+    local_filepath : str or None
+        path and filename to write the matching records to (default None, records are returned as a generator)
+    input_format : str
+        format of the file(s) in S3: 'csv', 'json' (one object per line) or 'parquet' (default 'csv')
+    output_format : str
+        format of the returned records: 'csv' or 'json' (default 'csv')
+    compression : str
+        compression of csv or json file(s): 'NONE', 'GZIP' or 'BZIP2' (default 'NONE')
+    csv_header : bool
+        whether or not csv file(s) begin with a header row of column names (default True)
+    profile_name : str
+        profile name for credentials (default 'default' or organization-specific)
+    region_name : str
+        name of AWS region (default value 'us-west-2')
+    max_workers : int
+        number of files queried concurrently
+
+    Returns
+    -------
+    None or generator of str
+        if local_filepath is None then a generator of records (one str per record, without the trailing newline)
+        if local_filepath is provided then None
+
+    Example use
+    -----------
+    # Streaming filtered records from all csv files in a directory:
+    for record in s3_select(
+            bucket='my_bucket',
+            s3_filepath='tmp/*.csv',
+            sql="select s.col1, s.col2 from S3Object s where s.col3 = 'foo'"):
+        print(record)
+
+    # Writing filtered records from a list of parquet files to a local file as json lines:
+    s3_select(
+        bucket='my_bucket',
+        s3_filepath=['tmp/my_file1.parquet', 'tmp/my_file2.parquet'],
+        sql='select * from S3Object s where s.col1 > 10',
+        local_filepath='../data/filtered.json',
+        input_format='parquet',
+        output_format='json')
+    """
+    _delete_filepath_validator(s3_filepath=s3_filepath)
+    _s3_select_arg_validator(
+        sql=sql,
+        local_filepath=local_filepath,
+        input_format=input_format,
+        output_format=output_format,
+        compression=compression,
+        csv_header=csv_header,
+        max_workers=max_workers)
+    my_bucket = s3_get_bucket(
+        bucket=bucket,
+        profile_name=profile_name,
+        region_name=region_name)
+    if isinstance(s3_filepath, str):
+        if '*' in s3_filepath:
+            s3_filepath = _s3_glob(s3_filepath=s3_filepath, my_bucket=my_bucket)
+        else:
+            s3_filepath = [s3_filepath]
+    if input_format == 'csv':
+        input_serialization = {
+            'CSV': {
+                'FileHeaderInfo': 'USE' if csv_header else 'NONE',
+                # otherwise S3 Select splits rows at newlines within quoted fields
+                'AllowQuotedRecordDelimiter': True},
+            'CompressionType': compression}
+    elif input_format == 'json':
+        input_serialization = {'JSON': {'Type': 'LINES'}, 'CompressionType': compression}
+    else:
+        input_serialization = {'Parquet': {}}
+    # newlines also appear inside quoted csv fields, so csv records are split with the quote character in mind
+    if output_format == 'csv':
+        output_serialization = {'CSV': {'RecordDelimiter': '\n', 'QuoteCharacter': '"'}}
+    else:
+        output_serialization = {'JSON': {'RecordDelimiter': '\n'}}
+    records = _s3_select_iter(
+        client=my_bucket.meta.client,
+        bucket=bucket,
+        s3_keys=s3_filepath,
+        sql=sql,
+        input_serialization=input_serialization,
+        output_serialization=output_serialization,
+        quote_character=b'"' if output_format == 'csv' else None,
+        max_workers=max_workers)
+    if local_filepath is None:
+        return (record.decode() for batch in records for record in batch)
+    with open(local_filepath, 'wb') as f:
+        for batch in records:
+            f.write(b''.join(record + b'\n' for record in batch))
+    return
+
+
+def _s3_map_iter(bucket, s3_keys, func, processes, threads_per_process, profile_name, region_name):
+    """ Submits batches of keys to a process pool and yields (s3_key, result) tuples as batches complete
+
+    Only a bounded window of batches is submitted at a time, so if the generator is closed or a batch raises, the
+    remaining batches are never started and shutting down the pool only waits for those already running.
+
+    Parameters
+    ----------
+    See s3_map
+
+    Returns
+    -------
+    generator of tuples
+        (s3_key, result) for each key
+    """
+    batches = iter([s3_keys[i:i + threads_per_process] for i in range(0, len(s3_keys), threads_per_process)])
+    window = 2 * (processes or os.cpu_count() or 1)
+    executor = ProcessPoolExecutor(max_workers=processes)
+    pending = set()
+
+    def submit_next():
+        batch = next(batches, None)
+        if batch is not None:
+            pending.add(executor.submit(
+                _s3_map_batch,
+                bucket, batch, func, threads_per_process, profile_name, region_name))
+
+    try:
+        for _ in range(window):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                submit_next()
+                for item in future.result():
+                    yield item
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+# boto3 clients cached per worker process, keyed by (profile_name, region_name)
+_worker_clients = {}
+
+
+def _s3_map_batch(bucket, s3_keys, func, threads_per_process, profile_name, region_name):
+    """ Reads a batch of keys with a thread pool and applies func to each (runs in a worker process)
+
+    Parameters
+    ----------
+    See s3_map
+
+    Returns
+    -------
+    list of tuples
+        (s3_key, result) for each key in the batch
+    """
+    client_key = (profile_name, region_name)
+    if client_key not in _worker_clients:
+        session = boto_create_session(profile_name=profile_name, region_name=region_name)
+        _worker_clients[client_key] = session.client('s3')
+    client = _worker_clients[client_key]
+
+    def read_one(s3_key):
+        try:
+            body = client.get_object(Bucket=bucket, Key=s3_key)['Body'].read()
+        except ClientError as e:
+            _raise_client_error(e)
+        return s3_key, func(s3_key, body)
+
+    with ThreadPoolExecutor(max_workers=threads_per_process) as executor:
+        return list(executor.map(read_one, s3_keys))
+
+
+def _s3_copy(
+        bucket,
+        source_s3_filepath,
+        dest_s3_filepath,
+        dest_bucket,
+        profile_name,
+        region_name,
+        multipart_threshold,
+        multipart_chunksize,
+        max_workers):
+    """ Performs the server-side copy shared by s3_copy and s3_move
+
+    Objects at or below multipart_threshold are copied with a single CopyObject request, larger objects are
+    copied in parallel parts with UploadPartCopy. Files are copied concurrently across max_workers threads.
+
+    Parameters
+    ----------
+    See s3_copy
+
+    Returns
+    -------
+    boto3 bucket object and list of str
+        source bucket object and the source keys that were copied
+    """
+    _copy_move_filepath_validator(source_s3_filepath=source_s3_filepath, dest_s3_filepath=dest_s3_filepath)
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise ValueError('max_workers must be a positive int')
+    my_bucket = s3_get_bucket(
+        bucket=bucket,
+        profile_name=profile_name,
+        region_name=region_name)
+    if dest_bucket is None or dest_bucket == bucket:
+        dest_bucket = bucket
+    else:
+        # confirm the destination bucket exists before copying anything
+        s3_get_bucket(
+            bucket=dest_bucket,
+            profile_name=profile_name,
+            region_name=region_name)
+    config = TransferConfig(multipart_threshold=multipart_threshold,
+                            multipart_chunksize=multipart_chunksize)
+    if isinstance(source_s3_filepath, str):
+        if '*' in source_s3_filepath:
+            source_s3_filepath = _s3_glob(s3_filepath=source_s3_filepath, my_bucket=my_bucket)
+            dest_s3_filepath = [dest_s3_filepath + key.split('/')[-1] for key in source_s3_filepath]
+        else:
+            source_s3_filepath = [source_s3_filepath]
+            dest_s3_filepath = [dest_s3_filepath]
+    if dest_bucket == bucket:
+        for source_key, dest_key in zip(source_s3_filepath, dest_s3_filepath):
+            if source_key == dest_key:
+                raise ValueError('The source and destination of {0} are the same file'.format(source_key))
+    # a pattern also matches files in subdirectories, whose filenames may collide once the directories are dropped
+    seen = set()
+    for dest_key in dest_s3_filepath:
+        if dest_key in seen:
+            raise ValueError('More than one file would be copied to {0}'.format(dest_key))
+        seen.add(dest_key)
+    # the low-level client is thread-safe, unlike the bucket resource
+    client = my_bucket.meta.client
+
+    def copy_one(source_key, dest_key):
+        try:
+            client.copy(
+                CopySource={'Bucket': bucket, 'Key': source_key},
+                Bucket=dest_bucket,
+                Key=dest_key,
+                Config=config)
+        except ClientError as e:
+            _raise_client_error(e)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(copy_one, source_key, dest_key)
+                   for source_key, dest_key in zip(source_s3_filepath, dest_s3_filepath)]
+    # re-raise the first error encountered, if any
+    for future in futures:
+        future.result()
+    return my_bucket, source_s3_filepath
+
+
+def _s3_delete_keys(s3_keys, my_bucket):
+    """ Deletes keys from an S3 bucket in batches of up to 1000 (the DeleteObjects limit)
+
+    Parameters
+    ----------
+    s3_keys : list of str
+        keys within the bucket to be deleted
+    my_bucket : boto3 bucket object
+        the S3 bucket object containing the keys
+
+    Returns
+    -------
+    List
+        Deleted keys
+
+    Raises
+    ------
+    RuntimeError
+        if S3 reports that any key could not be deleted (after attempting every batch)
+    """
+    deleted = []
+    errors = []
+    for i in range(0, len(s3_keys), 1000):
+        objects = [{'Key': key} for key in s3_keys[i:i + 1000]]
+        response = my_bucket.delete_objects(Delete={'Objects': objects})
+        deleted.extend(response.get('Deleted', []))
+        errors.extend(response.get('Errors', []))
+    if errors:
+        failed = ', '.join('{0} ({1})'.format(error['Key'], error.get('Code')) for error in errors)
+        raise RuntimeError('{0} of {1} keys could not be deleted: {2}'.format(len(errors), len(s3_keys), failed))
+    return deleted
+
+
+def _s3_select_iter(
+        client,
+        bucket,
+        s3_keys,
+        sql,
+        input_serialization,
+        output_serialization,
+        quote_character,
+        max_workers):
+    """ Runs select_object_content concurrently across keys and yields batches of records as they arrive
+
+    Each thread splits its own event stream into complete records, so records from different keys are never mixed.
+    The queue between the threads and the consumer is bounded. If the generator is closed, queued keys are never
+    queried and running threads close their event streams.
+
+    Parameters
+    ----------
+    client : boto3 S3 client object
+        client used for the select requests
+    s3_keys : list of str
+        keys within the bucket to be queried
+    quote_character : bytes or None
+        the csv QuoteCharacter set in output_serialization, or None for json output
+    See s3_select for the remaining parameters
+
+    Returns
+    -------
+    generator of lists of bytes
+        batches of records without the trailing newline
+    """
+    records_queue = queue.Queue(maxsize=max_workers * 4)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                records_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def select_one(s3_key):
+        if stop.is_set():  # the generator was closed before this key was reached
+            return
+        try:
+            response = client.select_object_content(
+                Bucket=bucket,
+                Key=s3_key,
+                ExpressionType='SQL',
+                Expression=sql,
+                InputSerialization=input_serialization,
+                OutputSerialization=output_serialization)
+            remainder = b''
+            for event in response['Payload']:
+                if 'Records' in event:
+                    batch, remainder = _split_select_records(
+                        data=remainder + event['Records']['Payload'],
+                        quote_character=quote_character)
+                    if batch and not put(('records', batch)):
+                        break
+                if stop.is_set():
+                    break
+            if stop.is_set():
+                response['Payload'].close()
+                return
+            if remainder:
+                put(('records', [remainder]))
+        except Exception as e:
+            put(('error', e))
+        finally:
+            put(('done', s3_key))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = []
+    try:
+        for s3_key in s3_keys:
+            futures.append(executor.submit(select_one, s3_key))
+        remaining = len(s3_keys)
+        while remaining:
+            kind, value = records_queue.get()
+            if kind == 'done':
+                remaining -= 1
+            elif kind == 'error':
+                raise value
+            else:
+                yield value
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _split_select_records(data, quote_character):
+    """ Splits S3 Select output into complete newline-delimited records and an incomplete remainder
+
+    A newline inside a quoted csv field is part of the record rather than the end of it. Quotes within fields are
+    escaped by doubling them, so a newline ends a record only when the record holds an even number of quotes.
+
+    Parameters
+    ----------
+    data : bytes
+        output received so far that has not yet been split into records
+    quote_character : bytes or None
+        the csv quote character, or None if records cannot contain newlines (json)
+
+    Returns
+    -------
+    list of bytes and bytes
+        complete records (without the trailing newline) and the remaining bytes of an incomplete record
+    """
+    *pieces, remainder = data.split(b'\n')
+    if quote_character is None:
+        return pieces, remainder
+    records = []
+    pending = None
+    for piece in pieces:
+        pending = piece if pending is None else pending + b'\n' + piece
+        if pending.count(quote_character) % 2 == 0:
+            records.append(pending)
+            pending = None
+    if pending is not None:
+        remainder = pending + b'\n' + remainder
+    return records, remainder
+
+
+def _s3_pack_plan(local_filepath, s3_filepath, bundle_size, upload_id):
+    """ Groups local files into bundles and builds the pack index
+
+    Parameters
+    ----------
+    local_filepath : list of str
+        path and filename(s) to be packed
+    s3_filepath : str
+        path and name of the pack within the bucket (without extension)
+    bundle_size : int
+        target size in bytes of each bundle
+    upload_id : str
+        identifier unique to this upload, included in the bundle keys
+
+    Returns
+    -------
+    list of lists of str and dict
+        local files in each bundle and the index with keys 'bundles' (S3 keys) and 'members'
+        (list of [name, bundle number, offset, length])
+    """
+    bundles = []
+    members = []
+    seen = set()
+    current, offset = [], 0
+    for local_file in local_filepath:
+        name = os.path.basename(local_file)
+        if name in seen:
+            raise ValueError('Packed filenames must be unique, {0} appears more than once'.format(name))
+        seen.add(name)
+        length = os.path.getsize(local_file)
+        # start a new bundle once the current one is full, but never leave a bundle empty
+        if current and length and offset + length > bundle_size:
+            bundles.append(current)
+            current, offset = [], 0
+        members.append([name, len(bundles), offset, length])
+        current.append(local_file)
+        offset += length
+    if current:
+        bundles.append(current)
+    bundle_keys = ['{0}.{1}.{2:05d}.pack'.format(s3_filepath, upload_id, i) for i in range(len(bundles))]
+    return bundles, {'bundles': bundle_keys, 'members': members}
+
+
+def _s3_pack_get_index(bucket, s3_filepath, client, missing_ok=False):
+    """ Fetches and parses the index of a pack created by s3_pack_upload
+
+    Parameters
+    ----------
+    bucket : str
+        name of S3 bucket
+    s3_filepath : str
+        path and name of the pack within the bucket (without extension)
+    client : boto3 S3 client object
+        client used to fetch the index
+    missing_ok : bool
+        whether to return None rather than raise if the index does not exist (default False)
+
+    Returns
+    -------
+    dict or None
+        the pack index, or None if it does not exist and missing_ok
+    """
+    response = _s3_pack_get_object(
+        client=client,
+        bucket=bucket,
+        s3_key=s3_filepath + '.index.json',
+        missing_ok=missing_ok)
+    if response is None:
+        return None
+    return json.loads(response['Body'].read().decode())
+
+
+def _s3_pack_get_object(client, bucket, s3_key, missing_ok=False, **kwargs):
+    """ Gets an object belonging to a pack and raises clear errors
+
+    Parameters
+    ----------
+    client : boto3 S3 client object
+        client used to fetch the object
+    bucket : str
+        name of S3 bucket
+    s3_key : str
+        key of the pack index or bundle
+    missing_ok : bool
+        whether to return None rather than raise if the object does not exist (default False)
+    kwargs
+        additional get_object arguments (e.g. Range)
+
+    Returns
+    -------
+    dict or None
+        the get_object response, or None if the object does not exist and missing_ok
+    """
+    try:
+        return client.get_object(Bucket=bucket, Key=s3_key, **kwargs)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+            if missing_ok:
+                return None
+            raise NameError('404 Pack object {0} does not exist'.format(s3_key))
+        _raise_client_error(e)
+
+
+def _raise_client_error(e):
+    """ Re-raises a botocore ClientError, translating expired or invalid credentials into a clear error
+
+    Parameters
+    ----------
+    e : botocore ClientError
+        the error raised by an S3 request
+
+    Returns
+    -------
+    None
+    """
+    # S3 reports most errors with text codes (e.g. 'NoSuchKey'), so compare as str
+    if e.response['Error']['Code'] == '400':
+        raise NameError('The credentials are expired or not valid. ' + str(e))
+    raise e
 
 
 def _download_upload_filepath_validator(s3_filepath, local_filepath):
@@ -361,6 +1465,140 @@ def _delete_filepath_validator(s3_filepath):
     return
 
 
+def _copy_move_filepath_validator(source_s3_filepath, dest_s3_filepath):
+    """ Validates the source_s3_filepath and dest_s3_filepath arguments and raises clear errors
+
+    Parameters
+    ----------
+    source_s3_filepath : str or list of str
+        path and filename of item(s) within the source S3 bucket
+    dest_s3_filepath : str or list of str
+        path and filename of item(s) within the destination S3 bucket
+
+    Returns
+    -------
+    None
+    """
+    for arg in (source_s3_filepath, dest_s3_filepath):
+        if not isinstance(arg, (list, str)):
+            raise TypeError('Both source_s3_filepath and dest_s3_filepath must be of type list or str')
+    if type(source_s3_filepath) != type(dest_s3_filepath):
+        raise TypeError('Both source_s3_filepath and dest_s3_filepath must be of same type')
+    if isinstance(source_s3_filepath, list):
+        for f in source_s3_filepath + dest_s3_filepath:
+            if not isinstance(f, str):
+                raise TypeError('If source_s3_filepath and dest_s3_filepath are lists, they must contain strings')
+            if '*' in f:
+                raise ValueError('Wildcards (*) are not permitted within a list of filepaths')
+        if len(source_s3_filepath) != len(dest_s3_filepath):
+            raise ValueError('The source_s3_filepath list must the same number of elements as the dest_s3_filepath list')
+    elif '*' in dest_s3_filepath:
+        raise ValueError('Wildcards (*) are not permitted within dest_s3_filepath')
+    return
+
+
+def _s3_map_arg_validator(func, reduce_func, processes, threads_per_process):
+    """ Validates the s3_map arguments and raises clear errors
+
+    Parameters
+    ----------
+    func : callable
+        function applied to each file
+    reduce_func : callable or None
+        function combining two results
+    processes : int or None
+        number of worker processes
+    threads_per_process : int
+        number of files each worker process reads concurrently
+
+    Returns
+    -------
+    None
+    """
+    if not callable(func):
+        raise TypeError('func must be callable')
+    if reduce_func is not None and not callable(reduce_func):
+        raise TypeError('reduce_func must be callable or None')
+    for arg in (processes, threads_per_process):
+        if arg is not None and not isinstance(arg, int):
+            raise TypeError('processes and threads_per_process must be of int type')
+    if threads_per_process is None or threads_per_process < 1 or (processes is not None and processes < 1):
+        raise ValueError('processes and threads_per_process must be positive')
+    return
+
+
+def _pack_filepath_validator(local_filepath, s3_filepath):
+    """ Validates the local_filepath and s3_filepath arguments of s3_pack_upload and raises clear errors
+
+    Parameters
+    ----------
+    local_filepath : str or list of str
+        path and filename for local file(s)
+    s3_filepath : str
+        path and name of the pack within the S3 bucket
+
+    Returns
+    -------
+    None
+    """
+    if not isinstance(local_filepath, (list, str)):
+        raise TypeError('local_filepath must be of type list or str')
+    if not isinstance(s3_filepath, str):
+        raise TypeError('s3_filepath must be of str type')
+    if isinstance(local_filepath, list):
+        for f in local_filepath:
+            if not isinstance(f, str):
+                raise TypeError('If local_filepath is a list, it must contain strings')
+            if '*' in f:
+                raise ValueError('Wildcards (*) are not permitted within a list of filepaths')
+    if '*' in s3_filepath:
+        raise ValueError('Wildcards (*) are not permitted within s3_filepath')
+    return
+
+
+def _s3_select_arg_validator(sql, local_filepath, input_format, output_format, compression, csv_header, max_workers):
+    """ Validates the s3_select arguments and raises clear errors
+
+    Parameters
+    ----------
+    sql : str
+        S3 Select SQL expression
+    local_filepath : str or None
+        path and filename to write the matching records to
+    input_format : str
+        'csv', 'json' or 'parquet'
+    output_format : str
+        'csv' or 'json'
+    compression : str
+        'NONE', 'GZIP' or 'BZIP2'
+    csv_header : bool
+        whether or not csv file(s) begin with a header row
+    max_workers : int
+        number of files queried concurrently
+
+    Returns
+    -------
+    None
+    """
+    if not isinstance(sql, str):
+        raise TypeError('sql must be of str type')
+    if local_filepath is not None and not isinstance(local_filepath, str):
+        raise TypeError('local_filepath must be of str type or None')
+    if not isinstance(csv_header, bool):
+        raise TypeError('csv_header must be of bool type')
+    if input_format not in ('csv', 'json', 'parquet'):
+        raise ValueError("input_format must be 'csv', 'json' or 'parquet'")
+    if output_format not in ('csv', 'json'):
+        raise ValueError("output_format must be 'csv' or 'json'")
+    if compression not in ('NONE', 'GZIP', 'BZIP2'):
+        raise ValueError("compression must be 'NONE', 'GZIP' or 'BZIP2'")
+    if input_format == 'parquet' and compression != 'NONE':
+        raise ValueError("compression must be 'NONE' for parquet files, which are compressed internally")
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise ValueError('max_workers must be a positive int')
+    return
+
+
 def _s3_glob(s3_filepath, my_bucket):
     """ Searches a directory in an S3 bucket and returns keys matching the wildcard
 
@@ -0,0 +1,246 @@
+import time
+import itertools
+import threading
+from collections import deque
+
+
+PRIORITIES = ('interactive', 'bulk')
+
+
+def transfer_set_max_bandwidth(max_bandwidth=None):
+    """ Sets the bandwidth cap shared by all S3 uploads and downloads in this process
+
+    When the cap is reached, bytes are granted to 'interactive' transfers before 'bulk' transfers, and transfers
+    of the same priority receive an equal share. The cap applies to a single Python process; jobs running in
+    separate processes on the same host should each set their own share.
+
+    Parameters
+    ----------
+    max_bandwidth : int or float or None
+        maximum bytes per second across all transfers (default None, unlimited)
+
+    Returns
+    -------
+    None
+
+    Example use
+    -----------
+    # Limit this process to 50 MB/s:
+    transfer_set_max_bandwidth(max_bandwidth=50 * 1024 ** 2)
+
+    # Remove the limit:
+    transfer_set_max_bandwidth(max_bandwidth=None)
+    """
+    _bandwidth_validator(max_bandwidth=max_bandwidth)
+    _scheduler.set_max_bandwidth(max_bandwidth)
+    return
+
+
+def transfer_get_stats():
+    """ Returns live throughput statistics for S3 uploads and downloads in this process
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    dict
+        'max_bandwidth' (global cap or None), 'total_bytes' (bytes since import), 'throughput' (bytes per second
+        over the last few seconds) and 'transfers', a list with one dict per active transfer call containing
+        'id', 'priority', 'max_bandwidth', 'bytes' and 'throughput'
+
+    Example use
+    -----------
+    stats = transfer_get_stats()
+    print(stats['throughput'], [t['throughput'] for t in stats['transfers']])
+    """
+    return _scheduler.stats()
+
+
+class _TokenBucket:
+    """ Token bucket allowing a rate of bytes per second with bursts of up to one second """
+
+    def __init__(self, rate, clock=time.monotonic):
+        self.rate = rate
+        self.clock = clock
+        self.tokens = rate
+        self.last = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def consume(self, n):
+        """ Takes n tokens (going into debt if needed) and returns the seconds to wait for the debt to clear """
+        self.refill()
+        self.tokens -= n
+        return max(0.0, -self.tokens / self.rate)
+
+    def wait_time(self):
+        """ Returns the seconds until the bucket holds a positive number of tokens """
+        self.refill()
+        return 0.0 if self.tokens > 0 else -self.tokens / self.rate + 1e-3
+
+
+class _Transfer:
+    """ State for a single s3_download or s3_upload call registered with the scheduler """
+
+    def __init__(self, transfer_id, priority, max_bandwidth):
+        self.id = transfer_id
+        self.priority = priority
+        self.max_bandwidth = max_bandwidth
+        self.bucket = _TokenBucket(max_bandwidth) if max_bandwidth else None
+        self.bytes = 0
+        self.granted = 0
+        self.waiting = 0
+        self.history = deque()
+
+
+class _TransferScheduler:
+    """ Process-wide scheduler applying global and per call bandwidth caps to S3 transfers
+
+    Transfers report their progress through the boto3 Callback hook, which is invoked on the transfer threads for
+    every chunk read or sent. Blocking in the callback paces the transfer, so chunks are granted here one at a time:
+    first against the per call cap, then against the global cap in order of priority and bytes already granted.
+    """
+
+    def __init__(self, max_bandwidth=None, stats_window=5.0):
+        self._condition = threading.Condition()
+        self._bucket = _TokenBucket(max_bandwidth) if max_bandwidth else None
+        self._transfers = {}
+        self._ids = itertools.count()
+        self._stats_window = stats_window
+        self._history = deque()
+        self._total_bytes = 0
+
+    def set_max_bandwidth(self, max_bandwidth):
+        with self._condition:
+            self._bucket = _TokenBucket(max_bandwidth) if max_bandwidth else None
+            self._condition.notify_all()
+
+    def start(self, priority='interactive', max_bandwidth=None):
+        with self._condition:
+            transfer = _Transfer(next(self._ids), priority, max_bandwidth)
+            # join at the current share of the priority class so a new call cannot starve existing ones
+            peers = [t.granted for t in self._transfers.values() if t.priority == priority]
+            transfer.granted = min(peers) if peers else 0
+            self._transfers[transfer.id] = transfer
+            return transfer
+
+    def finish(self, transfer):
+        with self._condition:
+            self._transfers.pop(transfer.id, None)
+            self._condition.notify_all()
+
+    def callback(self, transfer):
+        """ Returns a boto3 Callback that paces the given transfer """
+        def _callback(bytes_amount):
+            self.acquire(transfer, bytes_amount)
+        return _callback
+
+    def acquire(self, transfer, n):
+        if n <= 0:  # boto3 reports negative progress when a chunk is retried
+            return
+        if transfer.bucket is not None:
+            with self._condition:
+                delay = transfer.bucket.consume(n)
+            if delay:
+                time.sleep(delay)
+        with self._condition:
+            if self._bucket is not None:
+                transfer.waiting += 1
+                try:
+                    while self._bucket is not None:
+                        wait = self._bucket.wait_time()
+                        if not wait and self._next_transfer() is transfer:
+                            self._bucket.consume(n)
+                            break
+                        self._condition.wait(wait or None)
+                finally:
+                    transfer.waiting -= 1
+            transfer.granted += n
+            self._record(transfer, n)
+            self._condition.notify_all()
+
+    def _next_transfer(self):
+        """ Returns the waiting transfer with the highest priority and the fewest bytes granted """
+        waiting = [t for t in self._transfers.values() if t.waiting]
+        if not waiting:
+            return None
+        return min(waiting, key=lambda t: (PRIORITIES.index(t.priority), t.granted))
+
+    def _record(self, transfer, n):
+        now = time.monotonic()
+        transfer.bytes += n
+        self._total_bytes += n
+        for history in (transfer.history, self._history):
+            history.append((now, n))
+            while history and history[0][0] < now - self._stats_window:
+                history.popleft()
+
+    def stats(self):
+        with self._condition:
+            cutoff = time.monotonic() - self._stats_window
+
+            def throughput(history):
+                return sum(n for t, n in history if t >= cutoff) / self._stats_window
+
+            return {
+                'max_bandwidth': self._bucket.rate if self._bucket is not None else None,
+                'total_bytes': self._total_bytes,
+                'throughput': throughput(self._history),
+                'transfers': [
+                    {
+                        'id': t.id,
+                        'priority': t.priority,
+                        'max_bandwidth': t.max_bandwidth,
+                        'bytes': t.bytes,
+                        'throughput': throughput(t.history),
+                    } for t in self._transfers.values()],
+            }
+
+
+_scheduler = _TransferScheduler()
+
+
+def _bandwidth_validator(max_bandwidth):
+    """ Validates a max_bandwidth argument and raises clear errors
+
+    Parameters
+    ----------
+    max_bandwidth : int or float or None
+        maximum bytes per second
+
+    Returns
+    -------
+    None
+    """
+    if max_bandwidth is None:
+        return
+    if isinstance(max_bandwidth, bool) or not isinstance(max_bandwidth, (int, float)):
+        raise TypeError('max_bandwidth must be of int or float type or None')
+    if max_bandwidth <= 0:
+        raise ValueError('max_bandwidth must be positive')
+    return
+
+
+def _transfer_arg_validator(max_bandwidth, priority):
+    """ Validates the max_bandwidth and priority arguments of transfer functions and raises clear errors
+
+    Parameters
+    ----------
+    max_bandwidth : int or float or None
+        maximum bytes per second for the call
+    priority : str
+        'interactive' or 'bulk'
+
+    Returns
+    -------
+    None
+    """
+    _bandwidth_validator(max_bandwidth=max_bandwidth)
+    if priority not in PRIORITIES:
+        raise ValueError("priority must be 'interactive' or 'bulk'")
+    return
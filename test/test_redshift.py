@@ -62,3 +62,101 @@ def test_create_creds_dict_keys():
     keys = ['host', 'dbname', 'user', 'password', 'port']
     creds_dict = rs._create_creds_dict(os.environ['TEST_CREDS'])
     assert all(key in creds_dict for key in keys)
+
+
+def test_redshift_execute_sql_profile_type_error():
+    # test whether redshift_execute_sql() raises the proper error
+    with pytest.raises(TypeError):
+        rs.redshift_execute_sql(sql='foo', env_var='TEST_CREDS', profile='True')
+
+
+def test_redshift_get_profile_type_error():
+    # test whether redshift_get_profile() raises the proper error
+    with pytest.raises(TypeError):
+        rs.redshift_get_profile(reset='True')
+
+
+# stand-ins for the Redshift system tables so profiling can be tested against a local Postgres
+profile_stub_sql = """
+create function pg_last_query_id() returns int as 'select 42' language sql;
+create view stl_wlm_query as
+    select * from (values (42, 6, 1500000, 2500000)) as t(query, service_class, total_queue_time, total_exec_time);
+create view svl_compile as
+    select * from (values
+        (42, 0, timestamp '2019-01-01 00:00:00', timestamp '2019-01-01 00:00:02', 1),
+        (42, 1, timestamp '2019-01-01 00:00:02', timestamp '2019-01-01 00:00:02', 0)
+    ) as t(query, segment, starttime, endtime, compile);
+create view svl_query_summary as
+    select * from (values (42, 0, 0, 0, 'scan   tbl=100', 900, 800, 10, 160, 'f')
+    ) as t(query, stm, seg, step, label, maxtime, avgtime, rows, bytes, is_diskbased);
+"""
+profile_drop_sql = """
+drop view if exists stl_wlm_query, svl_compile, svl_query_summary;
+drop function if exists pg_last_query_id();
+"""
+
+
+@pytest.fixture
+def postgres_profile_stubs():
+    # requires TEST_POSTGRES_CREDS, in the same format as Redshift credentials, pointing at a scratch database
+    if 'TEST_POSTGRES_CREDS' not in os.environ:
+        pytest.skip('TEST_POSTGRES_CREDS not set')
+    rs.redshift_execute_sql(sql=profile_drop_sql + profile_stub_sql, env_var='TEST_POSTGRES_CREDS')
+    rs.redshift_get_profile(reset=True)
+    yield
+    rs.redshift_get_profile(reset=True)
+    rs.redshift_execute_sql(sql=profile_drop_sql, env_var='TEST_POSTGRES_CREDS')
+
+
+def test_redshift_execute_sql_profile(postgres_profile_stubs):
+    # test whether redshift_execute_sql(profile=True) records a report from the system tables
+    data, columns = rs.redshift_execute_sql(
+        sql='select 1 as col1;', env_var='TEST_POSTGRES_CREDS', return_data=True, profile=True)
+    assert data == [(1,)]
+    profile = rs.redshift_get_profile()
+    report = profile['reports'][0]
+    assert profile['queries'] == 1
+    assert report['query_id'] == 42
+    assert report['error'] is None
+    assert set(report['timings']) == {'connect', 'execute', 'fetch'}
+    assert report['wlm'] == {'service_class': 6, 'queue_seconds': 1.5, 'exec_seconds': 2.5}
+    assert report['compile'] == {'segments': 2, 'compiled_segments': 1, 'compile_seconds': 2.0}
+    assert report['steps'][0]['label'] == 'scan   tbl=100'
+    assert profile['totals']['compile'] == 2.0
+
+
+def test_redshift_execute_sql_profile_execute_timing(postgres_profile_stubs):
+    # test whether the time to run the query and receive its rows is recorded under 'execute'
+    rs.redshift_execute_sql(
+        sql='select pg_sleep(0.3), 1 as col1;', env_var='TEST_POSTGRES_CREDS', return_data=True, profile=True)
+    timings = rs.redshift_get_profile()['reports'][0]['timings']
+    assert timings['execute'] >= 0.3
+    assert timings['fetch'] < 0.3
+
+
+def test_redshift_execute_sql_profile_multi_statement(postgres_profile_stubs):
+    # test whether profiling returns the same data as an unprofiled call for a multi-statement script
+    sql = 'create temp table profile_test as select 1 as col1; select col1 + 1 as col2 from profile_test;'
+    expected = rs.redshift_execute_sql(sql=sql, env_var='TEST_POSTGRES_CREDS', return_data=True)
+    assert expected == ([(2,)], ['col2'])
+    assert rs.redshift_execute_sql(sql=sql, env_var='TEST_POSTGRES_CREDS', return_data=True, profile=True) == expected
+    assert rs.redshift_get_profile()['reports'][0]['query_id'] == 42
+
+
+def test_redshift_get_profile_aggregates(postgres_profile_stubs):
+    # test whether redshift_get_profile() sums reports across calls and resets
+    for _ in range(3):
+        rs.redshift_execute_sql(sql='select 1;', env_var='TEST_POSTGRES_CREDS', profile=True)
+    profile = rs.redshift_get_profile(reset=True)
+    assert profile['queries'] == 3
+    assert profile['totals']['queue'] == pytest.approx(4.5)
+    assert rs.redshift_get_profile()['queries'] == 0
+
+
+def test_redshift_execute_sql_profile_missing_tables(postgres_profile_stubs):
+    # test whether a failed system table lookup is reported rather than raised
+    rs.redshift_execute_sql(sql='drop view svl_query_summary;', env_var='TEST_POSTGRES_CREDS')
+    rs.redshift_execute_sql(sql='select 1;', env_var='TEST_POSTGRES_CREDS', profile=True)
+    report = rs.redshift_get_profile()['reports'][0]
+    assert 'svl_query_summary' in report['error']
+    assert report['wlm'] is not None
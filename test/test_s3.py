@@ -1,4 +1,7 @@
+import time
+import multiprocessing
 import pytest
+from botocore.exceptions import ClientError
 from ..nordata import _s3 as s3
 
 
@@ -64,3 +67,488 @@ def test_s3_delete_value_error():
     # test whether s3_delete() raises the proper error
     with pytest.raises(ValueError):
         s3.s3_delete(bucket='test', s3_filepath=['*'])
+
+
+copy_move_TypeError_args = download_upload_TypeError_args
+
+
+@pytest.mark.parametrize('source_s3_filepath,dest_s3_filepath', copy_move_TypeError_args)
+def test_s3_copy_type_error(source_s3_filepath, dest_s3_filepath):
+    # test whether s3_copy() raises the proper error
+    with pytest.raises(TypeError):
+        s3.s3_copy(bucket='test', source_s3_filepath=source_s3_filepath, dest_s3_filepath=dest_s3_filepath)
+
+
+@pytest.mark.parametrize('source_s3_filepath,dest_s3_filepath', copy_move_TypeError_args)
+def test_s3_move_type_error(source_s3_filepath, dest_s3_filepath):
+    # test whether s3_move() raises the proper error
+    with pytest.raises(TypeError):
+        s3.s3_move(bucket='test', source_s3_filepath=source_s3_filepath, dest_s3_filepath=dest_s3_filepath)
+
+
+copy_move_ValueError_args = download_upload_ValueError_args + [('foo/*', 'bar/*')]
+
+
+@pytest.mark.parametrize('source_s3_filepath,dest_s3_filepath', copy_move_ValueError_args)
+def test_s3_copy_value_error(source_s3_filepath, dest_s3_filepath):
+    # test whether s3_copy() raises the proper error
+    with pytest.raises(ValueError):
+        s3.s3_copy(bucket='test', source_s3_filepath=source_s3_filepath, dest_s3_filepath=dest_s3_filepath)
+
+
+@pytest.mark.parametrize('source_s3_filepath,dest_s3_filepath', copy_move_ValueError_args)
+def test_s3_move_value_error(source_s3_filepath, dest_s3_filepath):
+    # test whether s3_move() raises the proper error
+    with pytest.raises(ValueError):
+        s3.s3_move(bucket='test', source_s3_filepath=source_s3_filepath, dest_s3_filepath=dest_s3_filepath)
+
+
+class _FakeBucket:
+    # minimal stand-in recording delete_objects calls, failing to delete any keys listed in fail_keys
+    def __init__(self, fail_keys=(), client=None):
+        self.calls = []
+        self.fail_keys = fail_keys
+        self.meta = type('meta', (), {'client': client})
+
+    def delete_objects(self, Delete):
+        self.calls.append(Delete['Objects'])
+        deleted = [obj for obj in Delete['Objects'] if obj['Key'] not in self.fail_keys]
+        errors = [{'Key': obj['Key'], 'Code': 'AccessDenied'} for obj in Delete['Objects']
+                  if obj['Key'] in self.fail_keys]
+        return {'Deleted': deleted, 'Errors': errors}
+
+
+def test_s3_delete_keys_batches():
+    # test whether _s3_delete_keys() splits deletes into batches of 1000
+    bucket = _FakeBucket()
+    keys = ['tmp/{0}'.format(i) for i in range(2500)]
+    deleted = s3._s3_delete_keys(s3_keys=keys, my_bucket=bucket)
+    assert [len(call) for call in bucket.calls] == [1000, 1000, 500]
+    assert len(deleted) == 2500
+
+
+def test_s3_delete_keys_errors():
+    # test whether _s3_delete_keys() raises when S3 reports keys it could not delete
+    bucket = _FakeBucket(fail_keys=['tmp/1500'])
+    keys = ['tmp/{0}'.format(i) for i in range(2500)]
+    with pytest.raises(RuntimeError, match='tmp/1500'):
+        s3._s3_delete_keys(s3_keys=keys, my_bucket=bucket)
+    # every batch is still attempted
+    assert len(bucket.calls) == 3
+
+
+class _FakeCopyClient:
+    # minimal stand-in recording copies and failing with a text error code, as S3 does
+    def __init__(self, error_code=None):
+        self.copies = []
+        self.error_code = error_code
+
+    def copy(self, CopySource, Bucket, Key, Config):
+        if self.error_code is not None:
+            raise ClientError({'Error': {'Code': self.error_code, 'Message': 'test'}}, 'CopyObject')
+        self.copies.append((CopySource['Key'], Key))
+
+
+@pytest.mark.parametrize('source_s3_filepath,dest_s3_filepath', [('tmp/a', 'tmp/a'), (['x', 'tmp/a'], ['y', 'tmp/a'])])
+def test_s3_copy_same_source_and_dest(monkeypatch, source_s3_filepath, dest_s3_filepath):
+    # test whether s3_copy() refuses to copy a file onto itself before copying anything
+    client = _FakeCopyClient()
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: _FakeBucket(client=client))
+    with pytest.raises(ValueError):
+        s3.s3_copy(bucket='test', source_s3_filepath=source_s3_filepath, dest_s3_filepath=dest_s3_filepath)
+    assert client.copies == []
+
+
+def test_s3_move_duplicate_dest(monkeypatch):
+    # test whether s3_move() refuses a pattern whose matches share a filename before copying or deleting anything
+    client = _FakeCopyClient()
+    bucket = _FakeBucket(client=client)
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: bucket)
+    monkeypatch.setattr(s3, '_s3_glob', lambda **kwargs: ['staging/a/x.csv', 'staging/b/x.csv'])
+    with pytest.raises(ValueError):
+        s3.s3_move(bucket='test', source_s3_filepath='staging/*', dest_s3_filepath='prod/')
+    assert client.copies == []
+    assert bucket.calls == []
+
+
+def test_s3_move_copy_error_code(monkeypatch):
+    # test whether s3_move() surfaces S3 errors with text codes and leaves the sources in place
+    bucket = _FakeBucket(client=_FakeCopyClient(error_code='AccessDenied'))
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: bucket)
+    with pytest.raises(ClientError):
+        s3.s3_move(bucket='test', source_s3_filepath='tmp/a', dest_s3_filepath='prod/a')
+    assert bucket.calls == []
+
+
+def _body_len(s3_key, body):
+    return len(body)
+
+
+s3_map_TypeError_args = [
+    (1, _body_len, None, None, 10),
+    (['foo', 1], _body_len, None, None, 10),
+    ('foo', 'bar', None, None, 10),
+    ('foo', _body_len, 'bar', None, 10),
+    ('foo', _body_len, None, '2', 10),
+    ('foo', _body_len, None, None, 1.5),
+]
+
+
+@pytest.mark.parametrize('s3_filepath,func,reduce_func,processes,threads_per_process', s3_map_TypeError_args)
+def test_s3_map_type_error(s3_filepath, func, reduce_func, processes, threads_per_process):
+    # test whether s3_map() raises the proper error
+    with pytest.raises(TypeError):
+        s3.s3_map(bucket='test', s3_filepath=s3_filepath, func=func, reduce_func=reduce_func,
+                  processes=processes, threads_per_process=threads_per_process)
+
+
+s3_map_ValueError_args = [
+    (['f*'], None, 10),
+    ('foo', 0, 10),
+    ('foo', None, 0),
+]
+
+
+@pytest.mark.parametrize('s3_filepath,processes,threads_per_process', s3_map_ValueError_args)
+def test_s3_map_value_error(s3_filepath, processes, threads_per_process):
+    # test whether s3_map() raises the proper error
+    with pytest.raises(ValueError):
+        s3.s3_map(bucket='test', s3_filepath=s3_filepath, func=_body_len,
+                  processes=processes, threads_per_process=threads_per_process)
+
+
+class _FakeBody:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class _FakeClient:
+    # minimal in-memory stand-in for the object calls made by the S3 functions, failing uploads to fail_key
+    def __init__(self, objects=None, fail_key=None):
+        self.objects = dict(objects or {})
+        self.fail_key = fail_key
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, Config):
+        if Key == self.fail_key:
+            raise s3.S3UploadFailedError('test')
+        self.objects[Key] = Fileobj.read()
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key, Range=None):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'test'}}, 'GetObject')
+        data = self.objects[Key]
+        if Range is not None:
+            start, end = Range[len('bytes='):].split('-')
+            data = data[int(start):int(end) + 1]
+        return {'Body': _FakeBody(data)}
+
+
+def test_s3_map_batch(monkeypatch):
+    # test whether _s3_map_batch() applies func to every key using the cached client
+    keys = ['tmp/a', 'tmp/bb', 'tmp/ccc']
+    monkeypatch.setitem(s3._worker_clients, ('default', 'us-west-2'), _FakeClient({key: key.encode() for key in keys}))
+    result = s3._s3_map_batch('test', keys, _body_len, 2, 'default', 'us-west-2')
+    assert result == [('tmp/a', 5), ('tmp/bb', 6), ('tmp/ccc', 7)]
+
+
+def test_s3_map_batch_error_code(monkeypatch):
+    # test whether _s3_map_batch() surfaces S3 errors with text codes
+    monkeypatch.setitem(s3._worker_clients, ('default', 'us-west-2'), _FakeClient())
+    with pytest.raises(ClientError, match='NoSuchKey'):
+        s3._s3_map_batch('test', ['tmp/missing'], _body_len, 2, 'default', 'us-west-2')
+
+
+def _slow_body_len(s3_key, body):
+    time.sleep(0.2)
+    return len(body)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='worker processes only inherit the stubbed client when forked')
+def test_s3_map_close(monkeypatch):
+    # test whether closing the generator early does not wait for every remaining key to be processed
+    keys = ['tmp/{0}'.format(i) for i in range(100)]
+    monkeypatch.setitem(s3._worker_clients, ('default', 'us-west-2'), _FakeClient({key: b'x' for key in keys}))
+    results = s3._s3_map_iter(bucket='test', s3_keys=keys, func=_slow_body_len, processes=2,
+                              threads_per_process=1, profile_name='default', region_name='us-west-2')
+    next(results)
+    start = time.time()
+    results.close()
+    # processing all 100 keys two at a time would take 10 s
+    assert time.time() - start < 3
+
+
+@pytest.mark.parametrize('initial,expected', [(None, None), (0, 0)])
+def test_s3_map_reduce_empty_match(monkeypatch, initial, expected):
+    # test whether s3_map() reduces a pattern matching no files to initial
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: None)
+    monkeypatch.setattr(s3, '_s3_glob', lambda **kwargs: [])
+    result = s3.s3_map(bucket='test', s3_filepath='tmp/*.csv', func=_body_len, reduce_func=max, initial=initial)
+    assert result == expected
+
+
+pack_upload_TypeError_args = [
+    (1, 'foo'),
+    ('foo', 1),
+    ([1], 'foo'),
+    (['foo'], ['bar']),
+]
+
+
+@pytest.mark.parametrize('local_filepath,s3_filepath', pack_upload_TypeError_args)
+def test_s3_pack_upload_type_error(local_filepath, s3_filepath):
+    # test whether s3_pack_upload() raises the proper error
+    with pytest.raises(TypeError):
+        s3.s3_pack_upload(bucket='test', local_filepath=local_filepath, s3_filepath=s3_filepath)
+
+
+pack_upload_ValueError_args = [
+    (['f*'], 'foo'),
+    ('foo', 'b*'),
+]
+
+
+@pytest.mark.parametrize('local_filepath,s3_filepath', pack_upload_ValueError_args)
+def test_s3_pack_upload_value_error(local_filepath, s3_filepath):
+    # test whether s3_pack_upload() raises the proper error
+    with pytest.raises(ValueError):
+        s3.s3_pack_upload(bucket='test', local_filepath=local_filepath, s3_filepath=s3_filepath)
+
+
+@pytest.mark.parametrize('s3_filepath,members', [(1, 'foo'), ('foo', 1), ('foo', [1])])
+def test_s3_pack_read_type_error(s3_filepath, members):
+    # test whether s3_pack_read() raises the proper error
+    with pytest.raises(TypeError):
+        s3.s3_pack_read(bucket='test', s3_filepath=s3_filepath, members=members)
+
+
+def test_s3_pack_plan(tmpdir):
+    # test whether _s3_pack_plan() groups files into bundles with correct offsets
+    local_files = []
+    for name, size in [('a', 40), ('b', 40), ('c', 100), ('d', 0)]:
+        f = tmpdir.join(name)
+        f.write_binary(b'x' * size)
+        local_files.append(str(f))
+    bundles, index = s3._s3_pack_plan(local_filepath=local_files, s3_filepath='tmp/pack', bundle_size=64,
+                                      upload_id='abc')
+    assert bundles == [local_files[:1], local_files[1:2], local_files[2:]]
+    assert index['bundles'] == ['tmp/pack.abc.00000.pack', 'tmp/pack.abc.00001.pack', 'tmp/pack.abc.00002.pack']
+    assert index['members'] == [['a', 0, 0, 40], ['b', 1, 0, 40], ['c', 2, 0, 100], ['d', 2, 100, 0]]
+
+
+def test_s3_pack_plan_duplicate_names(tmpdir):
+    # test whether _s3_pack_plan() rejects files sharing a filename
+    tmpdir.mkdir('one').join('a').write('x')
+    tmpdir.mkdir('two').join('a').write('x')
+    local_files = [str(tmpdir.join('one', 'a')), str(tmpdir.join('two', 'a'))]
+    with pytest.raises(ValueError):
+        s3._s3_pack_plan(local_filepath=local_files, s3_filepath='tmp/pack', bundle_size=64, upload_id='abc')
+
+
+class _FakePackBucket(_FakeBucket):
+    # deletes from the fake client's objects
+    def delete_objects(self, Delete):
+        for obj in Delete['Objects']:
+            self.meta.client.objects.pop(obj['Key'], None)
+        return super().delete_objects(Delete)
+
+
+def _pack_files(tmpdir, names):
+    local_files = []
+    for name in names:
+        f = tmpdir.join(name)
+        f.write_binary(name.encode() * 10)
+        local_files.append(str(f))
+    return local_files
+
+
+def test_s3_pack_upload_overwrite(monkeypatch, tmpdir):
+    # test whether overwriting a pack switches to new bundles and deletes the old ones
+    client = _FakeClient()
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: _FakePackBucket(client=client))
+    old = s3.s3_pack_upload(bucket='test', local_filepath=_pack_files(tmpdir, ['a', 'bb', 'ccc']),
+                            s3_filepath='tmp/pack', bundle_size=20)
+    new = s3.s3_pack_upload(bucket='test', local_filepath=_pack_files(tmpdir, ['ccc', 'a']),
+                            s3_filepath='tmp/pack', bundle_size=20)
+    assert not set(old['bundles']) & set(new['bundles'])
+    assert sorted(client.objects) == sorted(new['bundles'] + ['tmp/pack.index.json'])
+    assert s3.s3_pack_read(bucket='test', s3_filepath='tmp/pack', members=['a', 'ccc']) == {
+        'a': b'a' * 10, 'ccc': b'ccc' * 10}
+
+
+def test_s3_pack_upload_failure_keeps_existing_pack(monkeypatch, tmpdir):
+    # test whether a failed upload removes its own bundles and leaves the existing pack readable
+    client = _FakeClient()
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: _FakePackBucket(client=client))
+    s3.s3_pack_upload(bucket='test', local_filepath=_pack_files(tmpdir, ['a']), s3_filepath='tmp/pack')
+    before = dict(client.objects)
+    # the first bundle of the new upload succeeds and the second fails
+    monkeypatch.setattr(s3.uuid, 'uuid4', lambda: type('uuid', (), {'hex': 'failedupload'}))
+    client.fail_key = 'tmp/pack.failedupload.00001.pack'
+    with pytest.raises(s3.S3UploadFailedError):
+        s3.s3_pack_upload(bucket='test', local_filepath=_pack_files(tmpdir, ['bb', 'ccc']),
+                          s3_filepath='tmp/pack', bundle_size=20)
+    assert client.objects == before
+
+
+@pytest.mark.parametrize('local_filepath', ['nonexistent/*', []])
+def test_s3_pack_upload_no_files(monkeypatch, tmpdir, local_filepath):
+    # test whether packing no files raises rather than replacing an existing pack with an empty one
+    client = _FakeClient()
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: _FakePackBucket(client=client))
+    s3.s3_pack_upload(bucket='test', local_filepath=_pack_files(tmpdir, ['a']), s3_filepath='tmp/pack')
+    before = dict(client.objects)
+    with pytest.raises(ValueError):
+        s3.s3_pack_upload(bucket='test', local_filepath=local_filepath, s3_filepath='tmp/pack')
+    assert client.objects == before
+
+
+def test_s3_pack_missing_bundle(monkeypatch, tmpdir):
+    # test whether reading a pack with a missing bundle raises a clear error rather than masking NoSuchKey
+    client = _FakeClient()
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: _FakePackBucket(client=client))
+    index = s3.s3_pack_upload(bucket='test', local_filepath=_pack_files(tmpdir, ['a']), s3_filepath='tmp/pack')
+    del client.objects[index['bundles'][0]]
+    with pytest.raises(NameError, match='404'):
+        s3.s3_pack_read(bucket='test', s3_filepath='tmp/pack', members='a')
+    with pytest.raises(NameError, match='404'):
+        s3.s3_pack_download(bucket='test', s3_filepath='tmp/pack', local_filepath=str(tmpdir))
+
+
+s3_select_TypeError_args = [
+    (1, 'select * from S3Object', None),
+    ('foo', 1, None),
+    ('foo', 'select * from S3Object', 1),
+]
+
+
+def test_s3_select_csv_header_type_error():
+    # test whether s3_select() raises the proper error
+    with pytest.raises(TypeError):
+        s3.s3_select(bucket='test', s3_filepath='foo', sql='select * from S3Object', csv_header='True')
+
+
+@pytest.mark.parametrize('s3_filepath,sql,local_filepath', s3_select_TypeError_args)
+def test_s3_select_type_error(s3_filepath, sql, local_filepath):
+    # test whether s3_select() raises the proper error
+    with pytest.raises(TypeError):
+        s3.s3_select(bucket='test', s3_filepath=s3_filepath, sql=sql, local_filepath=local_filepath)
+
+
+s3_select_ValueError_args = [
+    (['f*'], 'csv', 'csv', 'NONE'),
+    ('foo', 'xml', 'csv', 'NONE'),
+    ('foo', 'csv', 'parquet', 'NONE'),
+    ('foo', 'csv', 'csv', 'ZIP'),
+    ('foo', 'parquet', 'csv', 'GZIP'),
+]
+
+
+@pytest.mark.parametrize('s3_filepath,input_format,output_format,compression', s3_select_ValueError_args)
+def test_s3_select_value_error(s3_filepath, input_format, output_format, compression):
+    # test whether s3_select() raises the proper error
+    with pytest.raises(ValueError):
+        s3.s3_select(bucket='test', s3_filepath=s3_filepath, sql='select * from S3Object',
+                     input_format=input_format, output_format=output_format, compression=compression)
+
+
+class _FakeEventStream:
+    # minimal stand-in for the botocore event stream returned by select_object_content
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeSelectClient:
+    # minimal stand-in streaming each key's records in events that split records mid-record
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.calls = []
+        self.streams = []
+
+    def select_object_content(self, Bucket, Key, **kwargs):
+        self.calls.append((Key, kwargs))
+        events = [{'Records': {'Payload': chunk}} for chunk in self.payloads[Key]]
+        self.streams.append(_FakeEventStream(events + [{'Stats': {}}, {'End': {}}]))
+        return {'Payload': self.streams[-1]}
+
+
+def test_s3_select_iter_records():
+    # test whether _s3_select_iter() reassembles records split across events for every key
+    client = _FakeSelectClient({
+        'tmp/a': [b'1,a\n2,', b'a\n3,a\n'],
+        'tmp/b': [b'1,b\n', b'2,b'],
+        'tmp/c': []})
+    batches = s3._s3_select_iter(client=client, bucket='test', s3_keys=['tmp/a', 'tmp/b', 'tmp/c'], sql='',
+                                 input_serialization={}, output_serialization={}, quote_character=b'"',
+                                 max_workers=2)
+    records = [record for batch in batches for record in batch]
+    assert sorted(records) == [b'1,a', b'1,b', b'2,a', b'2,b', b'3,a']
+    assert [r for r in records if r.endswith(b'a')] == [b'1,a', b'2,a', b'3,a']
+
+
+def test_s3_select_iter_error():
+    # test whether _s3_select_iter() re-raises errors from the select threads
+    client = _FakeSelectClient({})
+    with pytest.raises(KeyError):
+        list(s3._s3_select_iter(client=client, bucket='test', s3_keys=['tmp/missing'], sql='',
+                                input_serialization={}, output_serialization={}, quote_character=b'"',
+                                max_workers=1))
+
+
+def test_s3_select_iter_close():
+    # test whether closing the generator early stops queued keys from being queried and closes open streams
+    keys = ['tmp/{0}'.format(i) for i in range(40)]
+    client = _FakeSelectClient({key: [b'1\n'] * 100 for key in keys})
+    batches = s3._s3_select_iter(client=client, bucket='test', s3_keys=keys, sql='',
+                                 input_serialization={}, output_serialization={}, quote_character=b'"',
+                                 max_workers=2)
+    next(batches)
+    batches.close()
+    assert len(client.calls) < len(keys)
+
+
+def test_split_select_records():
+    # test whether _split_select_records() only ends csv records at newlines outside quoted fields
+    records, remainder = s3._split_select_records(
+        data=b'1,"a\nb"\n2,"say ""hi""\n3,x"\n4,"c\n', quote_character=b'"')
+    assert records == [b'1,"a\nb"', b'2,"say ""hi""\n3,x"']
+    assert remainder == b'4,"c\n'
+    records, remainder = s3._split_select_records(data=b'{"a": "x\\ny"}\n{"a"', quote_character=None)
+    assert records == [b'{"a": "x\\ny"}']
+    assert remainder == b'{"a"'
+
+
+@pytest.mark.parametrize('csv_header,file_header_info', [(True, 'USE'), (False, 'NONE')])
+def test_s3_select_csv_header(monkeypatch, csv_header, file_header_info):
+    # test whether s3_select() only treats the first row as a header when asked to
+    client = _FakeSelectClient({'tmp/a': [b'1,x\n']})
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: _FakeBucket(client=client))
+    list(s3.s3_select(bucket='test', s3_filepath='tmp/a', sql='select * from S3Object', csv_header=csv_header))
+    assert client.calls[0][1]['InputSerialization']['CSV']['FileHeaderInfo'] == file_header_info
+
+
+def test_s3_select_embedded_newline(monkeypatch, tmpdir):
+    # test whether s3_select() keeps quoted csv fields containing newlines within a single record
+    client = _FakeSelectClient({'tmp/a': [b'1,"line one\nline', b' two"\n2,x\n']})
+    monkeypatch.setattr(s3, 's3_get_bucket', lambda **kwargs: _FakeBucket(client=client))
+    records = list(s3.s3_select(bucket='test', s3_filepath='tmp/a', sql='select * from S3Object'))
+    assert records == ['1,"line one\nline two"', '2,x']
+    assert client.calls[0][1]['OutputSerialization'] == {'CSV': {'RecordDelimiter': '\n', 'QuoteCharacter': '"'}}
+    assert client.calls[0][1]['InputSerialization']['CSV']['AllowQuotedRecordDelimiter'] is True
+    local_file = str(tmpdir.join('out.csv'))
+    s3.s3_select(bucket='test', s3_filepath='tmp/a', sql='select * from S3Object', local_filepath=local_file)
+    with open(local_file, 'rb') as f:
+        assert f.read() == b'1,"line one\nline two"\n2,x\n'
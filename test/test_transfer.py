@@ -0,0 +1,185 @@
+import time
+import threading
+import pytest
+from ..nordata import _transfer as tr
+from ..nordata import _s3 as s3
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_burst():
+    # test whether _TokenBucket allows a burst of up to one second of tokens without waiting
+    bucket = tr._TokenBucket(100, clock=_FakeClock())
+    assert bucket.consume(100) == 0
+
+
+def test_token_bucket_debt():
+    # test whether _TokenBucket returns the time needed to pay back a debt
+    bucket = tr._TokenBucket(100, clock=_FakeClock())
+    assert bucket.consume(150) == pytest.approx(0.5)
+
+
+def test_token_bucket_refill():
+    # test whether _TokenBucket refills at its rate and caps at one second of tokens
+    clock = _FakeClock()
+    bucket = tr._TokenBucket(100, clock=clock)
+    bucket.consume(100)
+    clock.now = 0.5
+    assert bucket.consume(50) == 0
+    clock.now = 10
+    bucket.refill()
+    assert bucket.tokens == 100
+
+
+def test_scheduler_next_transfer_priority():
+    # test whether interactive transfers are granted bytes before bulk transfers
+    scheduler = tr._TransferScheduler()
+    bulk = scheduler.start(priority='bulk')
+    interactive = scheduler.start(priority='interactive')
+    interactive.granted = 10 ** 9
+    bulk.waiting = interactive.waiting = 1
+    assert scheduler._next_transfer() is interactive
+
+
+def test_scheduler_next_transfer_fair_share():
+    # test whether transfers of the same priority are granted bytes in turn
+    scheduler = tr._TransferScheduler()
+    first = scheduler.start(priority='bulk')
+    second = scheduler.start(priority='bulk')
+    first.granted = 100
+    first.waiting = second.waiting = 1
+    assert scheduler._next_transfer() is second
+
+
+def test_scheduler_start_joins_at_current_share():
+    # test whether a new transfer starts at the smallest share of its priority class
+    scheduler = tr._TransferScheduler()
+    scheduler.start(priority='bulk').granted = 100
+    assert scheduler.start(priority='bulk').granted == 100
+    assert scheduler.start(priority='interactive').granted == 0
+
+
+def test_scheduler_stats():
+    # test whether the scheduler reports bytes for active transfers and forgets finished ones
+    scheduler = tr._TransferScheduler()
+    transfer = scheduler.start(priority='bulk', max_bandwidth=10 ** 9)
+    scheduler.callback(transfer)(1000)
+    scheduler.callback(transfer)(-500)  # retried chunks are ignored
+    stats = scheduler.stats()
+    assert stats['total_bytes'] == 1000
+    assert stats['transfers'][0]['bytes'] == 1000
+    assert stats['transfers'][0]['priority'] == 'bulk'
+    scheduler.finish(transfer)
+    assert scheduler.stats()['transfers'] == []
+
+
+@pytest.mark.parametrize('max_bandwidth', ['100', True])
+def test_transfer_set_max_bandwidth_type_error(max_bandwidth):
+    # test whether transfer_set_max_bandwidth() raises the proper error
+    with pytest.raises(TypeError):
+        tr.transfer_set_max_bandwidth(max_bandwidth=max_bandwidth)
+
+
+@pytest.mark.parametrize('max_bandwidth', [0, -1])
+def test_transfer_set_max_bandwidth_value_error(max_bandwidth):
+    # test whether transfer_set_max_bandwidth() raises the proper error
+    with pytest.raises(ValueError):
+        tr.transfer_set_max_bandwidth(max_bandwidth=max_bandwidth)
+
+
+@pytest.mark.parametrize('max_bandwidth,priority', [(0, 'bulk'), (None, 'urgent')])
+def test_s3_download_transfer_value_error(max_bandwidth, priority):
+    # test whether s3_download() raises the proper error
+    with pytest.raises(ValueError):
+        s3.s3_download(bucket='test', s3_filepath='foo', local_filepath='bar',
+                       max_bandwidth=max_bandwidth, priority=priority)
+
+
+@pytest.mark.parametrize('max_bandwidth,priority', [(0, 'bulk'), (None, 'urgent')])
+def test_s3_upload_transfer_value_error(max_bandwidth, priority):
+    # test whether s3_upload() raises the proper error
+    with pytest.raises(ValueError):
+        s3.s3_upload(bucket='test', local_filepath='foo', s3_filepath='bar',
+                     max_bandwidth=max_bandwidth, priority=priority)
+
+
+CHUNK = 64 * 1024
+RATE = 1024 * 1024
+
+
+def _acquire_chunks(scheduler, transfer, n_chunks, grants, lock):
+    # acquire chunks the way the boto3 Callback does, recording the order in which they are granted
+    for _ in range(n_chunks):
+        scheduler.acquire(transfer, CHUNK)
+        with lock:
+            grants.append(transfer.priority)
+
+
+def test_scheduler_acquire_paces_to_global_cap():
+    # test whether concurrent transfers are paced to the global cap once the one second burst is spent
+    scheduler = tr._TransferScheduler(max_bandwidth=RATE)
+    transfers = [scheduler.start(priority='bulk') for _ in range(2)]
+    grants, lock = [], threading.Lock()
+    threads = [threading.Thread(target=_acquire_chunks, args=(scheduler, t, 16, grants, lock)) for t in transfers]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    # 2 MB at 1 MB/s with a 1 MB burst
+    assert 0.8 <= elapsed <= 1.6
+    assert scheduler.stats()['total_bytes'] == 32 * CHUNK
+
+
+def test_scheduler_acquire_interactive_before_bulk():
+    # test whether a waiting bulk transfer is not granted bytes while an interactive transfer is waiting
+    scheduler = tr._TransferScheduler(max_bandwidth=RATE)
+    # spend the burst and go a quarter second into debt so that both transfers start out waiting
+    scheduler.acquire(scheduler.start(priority='bulk'), RATE + RATE // 4)
+    bulk = scheduler.start(priority='bulk')
+    interactive = scheduler.start(priority='interactive')
+    grants, lock = [], threading.Lock()
+    bulk_thread = threading.Thread(target=_acquire_chunks, args=(scheduler, bulk, 4, grants, lock))
+    interactive_thread = threading.Thread(target=_acquire_chunks, args=(scheduler, interactive, 4, grants, lock))
+    bulk_thread.start()
+    time.sleep(0.05)
+    interactive_thread.start()
+    bulk_thread.join()
+    interactive_thread.join()
+    assert grants == ['interactive'] * 4 + ['bulk'] * 4
+
+
+def test_scheduler_set_max_bandwidth_wakes_waiters():
+    # test whether removing the global cap releases a transfer waiting on a large debt
+    scheduler = tr._TransferScheduler(max_bandwidth=1024)
+    transfer = scheduler.start()
+    scheduler.acquire(transfer, 100 * 1024)  # roughly 100 seconds of debt
+    thread = threading.Thread(target=scheduler.acquire, args=(transfer, CHUNK))
+    thread.start()
+    time.sleep(0.1)
+    assert thread.is_alive()
+    scheduler.set_max_bandwidth(None)
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+
+
+def test_scheduler_finish_wakes_waiters():
+    # test whether finishing the transfer that was next in line releases a transfer waiting behind it
+    scheduler = tr._TransferScheduler(max_bandwidth=RATE)
+    interactive = scheduler.start(priority='interactive')
+    interactive.waiting = 1  # stands in for an interactive chunk that is next in line
+    bulk = scheduler.start(priority='bulk')
+    thread = threading.Thread(target=scheduler.acquire, args=(bulk, CHUNK))
+    thread.start()
+    time.sleep(0.1)
+    assert thread.is_alive()
+    scheduler.finish(interactive)
+    thread.join(timeout=2)
+    assert not thread.is_alive()